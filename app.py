@@ -1,13 +1,14 @@
 import streamlit as st
-import whisper
+import io
 import os
-import tempfile
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 import requests
 import time
-import random
 import json
 import logging
 import re
@@ -91,21 +92,294 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Translate table built once: Windows-reserved and control characters plus
+# problematic Unicode punctuation all map to underscores in one C-level pass
+_FILENAME_TRANSLATE = str.maketrans(dict.fromkeys(
+    '<>:"|?*/\\'
+    + ''.join(chr(i) for i in range(32))
+    + '：？。·！@#￥%……&*（）——+【】、；',
+    '_',
+))
+_UNDERSCORE_RE = re.compile(r'_+')
+
+# Inline styling/karaoke tags stripped from WebVTT cue text
+_VTT_TAG_RE = re.compile(r'<[^>]+>')
+
+# A WebVTT cue: a timestamp line followed by its text block, which runs
+# until the next blank line
+_VTT_CUE_RE = re.compile(r'\d\d:\d\d[:.,]\d\d[^\n]*\n((?:(?!\n\n).)+)', re.DOTALL)
+
+# Fast path for the common YouTube URL shapes — matches the 11-character
+# video ID in a single pass; unusual URLs fall back to urlparse
+_VIDEO_ID_RE = re.compile(
+    r'(?:youtu\.be/|youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/))([A-Za-z0-9_-]{11})'
+)
+
+# Qwen CLI noise (system messages and debug output) filtered from stdout
+# with a single compiled pass per line
+_CLI_NOISE_RE = re.compile(
+    r'loaded cached qwen|loading qwen|processing request|generating response'
+    r'|qwen coder|qwen-code|node\.js|npm|[\[\]{}]|C:\\|/usr/|node_modules',
+    re.IGNORECASE,
+)
+
+# Sentinels the CLI prompt asks the model to wrap its summary in, so the
+# answer can be extracted exactly instead of guessed from stdout
+_SUMMARY_SENTINEL_RE = re.compile(r'<<<SUMMARY>>>(.*?)<<<END>>>', re.DOTALL)
+
+# OpenAI-compatible Qwen endpoint (DashScope) used for summarization
+QWEN_API_BASE = os.getenv("QWEN_API_BASE", "https://dashscope-intl.aliyuncs.com/compatible-mode/v1")
+QWEN_MODEL = os.getenv("QWEN_MODEL", "qwen-plus")
+
+# Transcripts longer than this are summarized chunk-by-chunk (map-reduce)
+# before the final summary pass; roughly 2k tokens per chunk
+MAX_CHUNK_CHARS = 8000
+
+# Static system prompt kept separate from the per-call user message so the
+# provider's prefix cache can reuse it across requests
+_SUMMARY_SYSTEM_PROMPT = (
+    "You summarize YouTube video transcripts. Provide a clear, very concise, "
+    "comprehensive summary that captures the main points and key information, "
+    "using the video title for context when one is given."
+)
+
+# Prompt templates for the CLI fallback, built once at import instead of
+# re-assembling the surrounding text per call
+_CLI_PROMPT_TITLED = """You are analyzing a YouTube video titled: "{title}"
+
+Please provide a very concise summary of the following transcript from this video:
+
+{text}
+
+Create a clear, comprehensive summary that captures the main points, key information, and context from the video title."""
+
+_CLI_PROMPT_PLAIN = """Please provide a very concise summary of the following transcript:
+
+{text}
+
+Create a clear, very concise, comprehensive summary that captures the main points and key information."""
+
+# Each Qwen CLI invocation spawns a Node process; cap how many run at once
+# so concurrent sessions queue instead of thrashing the host
+_QWEN_CLI_SEM = threading.BoundedSemaphore(int(os.getenv("QWEN_CLI_CONCURRENCY", "2")))
+
+
+@st.cache_resource(show_spinner=False)
+def get_qwen_client(api_key: str):
+    """Create the Qwen API client once per process."""
+    from openai import OpenAI
+    return OpenAI(base_url=QWEN_API_BASE, api_key=api_key)
+
+
+@lru_cache(maxsize=1)
+def _proxy_url():
+    """Read the proxy setting once per process instead of on every rerun."""
+    try:
+        if hasattr(st, 'secrets'):
+            proxy_val = st.secrets.get('proxy_url', '')
+            if proxy_val:
+                logging.info(f"Using proxy from secrets: {proxy_val}")
+                return proxy_val
+    except Exception as e:
+        logging.warning(f"Could not load proxy: {e}")
+    return None
+
+
+@st.cache_resource(show_spinner=False)
+def get_http_session():
+    """Shared requests.Session with connection pooling and bounded retries."""
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=10,
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _oembed_title(url: str):
+    """Fetch a video title via YouTube oEmbed, cached across reruns."""
+    # Module-level breaker rather than session state: this runs in worker
+    # threads, where st.session_state is not available
+    if not _OEMBED_BREAKER.allow():
+        logging.warning("oEmbed circuit breaker open; skipping title fetch")
+        return None
+    try:
+        resp = get_http_session().get(
+            "https://www.youtube.com/oembed",
+            params={"url": url, "format": "json"},
+            timeout=10,
+        )
+        if resp.status_code == 200:
+            _OEMBED_BREAKER.record_success()
+            return resp.json().get("title")
+        _OEMBED_BREAKER.record_failure()
+    except Exception:
+        _OEMBED_BREAKER.record_failure()
+    return None
+
+
+def _parse_subtitle_content(content):
+    """Extract plain text from a WebVTT subtitle document."""
+    # One finditer pass pulls each cue's text block directly, so headers,
+    # cue numbers, and timestamps never need per-line inspection
+    parts = (
+        _VTT_TAG_RE.sub('', match.group(1)).replace('\n', ' ').strip()
+        for match in _VTT_CUE_RE.finditer(content)
+    )
+    return ' '.join(part for part in parts if part)
+
+
+def _fetch_caption_track(video_id, lang):
+    """Fetch and parse one caption track; returns None when unavailable."""
+    sub = get_http_session().get(
+        "https://video.google.com/timedtext",
+        params={"lang": lang, "v": video_id, "fmt": "vtt"},
+        timeout=10,
+    )
+    if sub.status_code == 200 and sub.text.strip():
+        text = _parse_subtitle_content(sub.text)
+        if text:
+            logging.info(f"Using existing '{lang}' captions for {video_id}")
+            return text
+    return None
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_captions(video_id: str):
+    """Fetch existing YouTube captions for a video, cached across reruns."""
+    try:
+        # Common case first: probe the English variants concurrently and
+        # take the first track that answers — one RTT instead of three
+        executor = ThreadPoolExecutor(max_workers=3)
+        try:
+            futures = [
+                executor.submit(_fetch_caption_track, video_id, lang)
+                for lang in ('en', 'en-US', 'en-GB')
+            ]
+            for future in as_completed(futures):
+                try:
+                    text = future.result()
+                except Exception:
+                    # One variant timing out or resetting must not abort
+                    # probes that are still in flight
+                    continue
+                if text:
+                    return text
+        finally:
+            # Don't block on slower variants once a track has answered;
+            # a `with` block would join them on exit (up to the 10s timeout)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # Only when no English track answers, list what is available and
+        # take the first offered track
+        resp = get_http_session().get(
+            "https://video.google.com/timedtext",
+            params={"type": "list", "v": video_id},
+            timeout=10,
+        )
+        if resp.status_code != 200 or not resp.text.strip():
+            return None
+
+        import xml.etree.ElementTree as ET
+        tracks = ET.fromstring(resp.content)
+        langs = [t.get('lang_code') for t in tracks.findall('track') if t.get('lang_code')]
+        for lang in langs[:1]:
+            text = _fetch_caption_track(video_id, lang)
+            if text:
+                return text
+    except Exception as e:
+        logging.info(f"No usable captions for {video_id}: {str(e)}")
+    return None
+
+
+@st.cache_resource(show_spinner="Loading Whisper model...")
+def get_whisper_model(name: str = "tiny"):
+    """Load a Whisper model once per process and reuse it across reruns."""
+    # Imported lazily so app startup doesn't pay for the ASR stack before
+    # the first transcription is actually requested
+    from faster_whisper import WhisperModel
+    import ctranslate2
+
+    # CTranslate2 backend: fp16 on GPU when CUDA is present, otherwise int8
+    # quantization (~4x faster than the reference implementation on CPU)
+    if ctranslate2.get_cuda_device_count() > 0:
+        device, compute_type = "cuda", "float16"
+    else:
+        device, compute_type = "cpu", "int8"
+    # Let CTranslate2 use every available core on CPU (its default is
+    # conservative); harmless on GPU where decoding runs on the device
+    return WhisperModel(
+        name,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=os.cpu_count() or 4,
+    )
+
+
+class CircuitBreaker:
+    """Fail fast after repeated failures instead of waiting out timeouts.
+
+    Closed until `failure_threshold` consecutive failures, then open for
+    `reset_timeout` seconds; after that one probe call is let through and
+    a success closes the breaker again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        # Half-open: allow a single probe once the timeout has passed
+        return time.time() - self.opened_at >= self.reset_timeout
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.time()
+
+
+def _rapidapi_breaker():
+    """Circuit breaker for RapidAPI, shared across reruns of a session."""
+    if 'cb_rapidapi' not in st.session_state:
+        st.session_state.cb_rapidapi = CircuitBreaker()
+    return st.session_state.cb_rapidapi
+
+
+# Breaker for the oEmbed title endpoint; module scope because the fetch
+# runs in worker threads (see _oembed_title)
+_OEMBED_BREAKER = CircuitBreaker()
+
+
 class YouTubeSummarizer:
     def __init__(self):
         self.videos_dir = Path("videos")
         self.videos_dir.mkdir(exist_ok=True)
 
+        # On-disk cache of transcripts/summaries keyed by video ID
+        self.cache_dir = self.videos_dir / "cache"
+        self.cache_dir.mkdir(exist_ok=True)
+
         # Initialize models (lazy loading)
         self.whisper_model = None
-        
-        # List of public invidious instances (fallback option)
-        self.invidious_instances = [
-            "https://inv.tux.pizza",
-            "https://invidious.nerdvpn.de", 
-            "https://inv.in.projectsegfau.lt",
-            "https://invidious.privacyredirect.com"
-        ]
 
         # Cookie and proxy support via Streamlit Secrets
         self.setup_cookies_and_proxy()
@@ -124,28 +398,26 @@ class YouTubeSummarizer:
             except:
                 pass
 
+        # Qwen API key for in-process summarization (preferred over the CLI)
+        self.qwen_api_key = os.getenv('DASHSCOPE_API_KEY', '')
+        if not self.qwen_api_key:
+            try:
+                if hasattr(st, 'secrets'):
+                    self.qwen_api_key = st.secrets.get('qwen_api_key', '')
+            except:
+                pass
+
         # Set FFmpeg path for Whisper
         self._set_ffmpeg_for_whisper()
 
     def setup_cookies_and_proxy(self):
         """Setup proxy from Streamlit secrets or environment"""
-        self.proxy_url = None
-        
-        # Try to get proxy
-        try:
-            if hasattr(st, 'secrets'):
-                proxy_val = st.secrets.get('proxy_url', '')
-                if proxy_val:
-                    self.proxy_url = proxy_val
-                    logging.info(f"Using proxy from secrets: {proxy_val}")
-        except Exception as e:
-            logging.warning(f"Could not load proxy: {e}")
+        self.proxy_url = _proxy_url()
     
-    def load_whisper_model(self):
-        """Load Whisper model for transcription"""
+    def load_whisper_model(self, name: str = "tiny"):
+        """Load Whisper model for transcription (cached across reruns)"""
         if self.whisper_model is None:
-            with st.spinner("Loading Whisper model..."):
-                self.whisper_model = whisper.load_model("base")
+            self.whisper_model = get_whisper_model(name)
         return self.whisper_model
 
     def _set_ffmpeg_for_whisper(self):
@@ -155,23 +427,23 @@ class YouTubeSummarizer:
 
     def sanitize_filename(self, filename):
         """Sanitize filename to remove problematic characters for Windows"""
-        import re
-        # Replace problematic characters with underscores (including Unicode)
-        # Windows reserved characters: < > : " | ? * \ / and control chars
-        sanitized = re.sub(r'[<>:"|?*\x00-\x1f]', '_', filename)
-        # Also handle common Unicode punctuation that causes issues
-        sanitized = re.sub(r'[：？]', '_', sanitized)  # Chinese colon and question mark
-        sanitized = re.sub(r'[。·！@#￥%……&*（）——+【】、；]', '_', sanitized)  # Other Unicode punctuation
-        # Replace backslashes and forward slashes
-        sanitized = re.sub(r'[/\\]', '_', sanitized)
+        # str.translate over a prebuilt table beats running the regex
+        # engine for a plain character-for-character substitution
+        sanitized = filename.translate(_FILENAME_TRANSLATE)
         # Remove multiple consecutive underscores
-        sanitized = re.sub(r'_+', '_', sanitized)
+        sanitized = _UNDERSCORE_RE.sub('_', sanitized)
         # Remove leading/trailing spaces and dots
-        sanitized = sanitized.strip(' ._')
-        return sanitized
+        return sanitized.strip(' ._')
 
-    def extract_video_id(self, url: str):
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def extract_video_id(url: str):
         """Extract the YouTube video ID from a variety of URL formats."""
+        # Single compiled-regex pass covers watch/shorts/embed/youtu.be
+        match = _VIDEO_ID_RE.search(url)
+        if match:
+            return match.group(1)
+
         try:
             parsed = urlparse(url)
             hostname = parsed.hostname or ""
@@ -195,28 +467,54 @@ class YouTubeSummarizer:
             pass
         return None
 
-    def fetch_title_via_oembed(self, url: str):
-        """Fetch video title via YouTube oEmbed (no auth)."""
+    def load_cached_result(self, video_id, model_name=None):
+        """Load the cached transcript/summary for a video ID, if present.
+
+        Entries transcribed with a different Whisper model than the one
+        currently selected are ignored; caption-sourced entries (and
+        legacy entries without a source) are model-independent.
+        """
+        cache_path = self.cache_dir / f"{video_id}.json"
         try:
-            resp = requests.get(
-                "https://www.youtube.com/oembed",
-                params={"url": url, "format": "json"},
-                timeout=10,
-            )
-            if resp.status_code == 200:
-                data = resp.json()
-                return data.get("title")
-        except Exception:
-            pass
+            if cache_path.exists():
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                source = entry.get('source')
+                if source in (None, 'captions') or model_name is None or source == model_name:
+                    return entry
+        except Exception as e:
+            logging.warning(f"Could not read cache for {video_id}: {e}")
         return None
 
+    def save_cached_result(self, video_id, transcript, summary, title=None, source=None):
+        """Persist the transcript/summary for a video ID."""
+        cache_path = self.cache_dir / f"{video_id}.json"
+        try:
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {
+                        'title': title,
+                        'transcript': transcript,
+                        'summary': summary,
+                        'source': source,
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+        except Exception as e:
+            logging.warning(f"Could not write cache for {video_id}: {e}")
+
+    def fetch_title_via_oembed(self, url: str):
+        """Fetch video title via YouTube oEmbed (no auth, cached)."""
+        return _oembed_title(url)
+
 
     def get_video_info_via_api(self, video_id):
         """Get video info using YouTube's public API endpoints"""
         try:
             # Try noembed API first
             noembed_url = f"https://noembed.com/embed?url=https://www.youtube.com/watch?v={video_id}"
-            resp = requests.get(noembed_url, timeout=10)
+            resp = get_http_session().get(noembed_url, timeout=10)
             if resp.status_code == 200:
                 data = resp.json()
                 return {
@@ -230,12 +528,24 @@ class YouTubeSummarizer:
 
 
     
+    def fetch_captions(self, video_id):
+        """Fetch existing YouTube captions so transcription can be skipped."""
+        return _fetch_captions(video_id)
+
     def download_with_online_api(self, url):
         """Fallback using RapidAPI YouTube downloader"""
         if not self.rapidapi_key or self.rapidapi_key == 'your_rapidapi_key_here':
             logging.error("RapidAPI key not configured or using placeholder value")
             return None, None
 
+        breaker = _rapidapi_breaker()
+        if not breaker.allow():
+            # Fail fast instead of burning another 30-60s timeout while
+            # the service is known to be down
+            logging.warning("RapidAPI circuit breaker open; failing fast")
+            st.error("⚠️ Download service looks temporarily unavailable. Please try again in a minute.")
+            return None, None
+
         try:
             # Extract video ID
             video_id = self.extract_video_id(url)
@@ -253,7 +563,7 @@ class YouTubeSummarizer:
             
             # Make API request
             logging.info(f"Making RapidAPI request for video ID: {video_id}")
-            response = requests.get(rapidapi_url, headers=headers, params=params, timeout=30)
+            response = get_http_session().get(rapidapi_url, headers=headers, params=params, timeout=30)
             logging.info(f"RapidAPI response status: {response.status_code}")
 
             if response.status_code == 200:
@@ -266,29 +576,38 @@ class YouTubeSummarizer:
                     
                     # Download MP3
                     logging.info(f"Downloading MP3 from: {mp3_url}")
-                    mp3_response = requests.get(mp3_url, timeout=60, stream=True)
+                    mp3_response = get_http_session().get(mp3_url, timeout=60, stream=True)
                     logging.info(f"MP3 download response status: {mp3_response.status_code}")
 
                     if mp3_response.status_code == 200:
-                        # Save to file
-                        mp3_path = self.videos_dir / f"rapidapi_{video_id}.mp3"
-                        logging.info(f"Saving to: {mp3_path}")
-
-                        try:
-                            with open(mp3_path, 'wb') as f:
-                                for chunk in mp3_response.iter_content(chunk_size=8192):
-                                    f.write(chunk)
-
-                            logging.info(f"Successfully saved MP3 file: {mp3_path}")
-                            return str(mp3_path), title
-                        except Exception as save_error:
-                            logging.error(f"Failed to save MP3 file: {str(save_error)}")
-                            raise Exception(f"File save failed: {str(save_error)}")
+                        # Keep the audio in memory; Whisper decodes file-like
+                        # objects directly so nothing needs to touch disk
+                        audio_buffer = io.BytesIO()
+                        # 1 MiB chunks amortize the per-chunk Python overhead
+                        # compared to the 8 KiB default
+                        for chunk in mp3_response.iter_content(chunk_size=1024 * 1024):
+                            audio_buffer.write(chunk)
+                        audio_buffer.seek(0)
+
+                        logging.info(f"Downloaded {audio_buffer.getbuffer().nbytes} bytes of audio")
+                        breaker.record_success()
+                        return audio_buffer, title
                     else:
                         logging.error(f"MP3 download failed with status: {mp3_response.status_code}")
                         raise Exception(f"MP3 download failed: HTTP {mp3_response.status_code}")
-                        
+                else:
+                    # Conversion refused (e.g. processing error, bad ID);
+                    # count it so sustained refusals open the breaker
+                    breaker.record_failure()
+                    logging.error(f"RapidAPI conversion failed: {data.get('msg', data.get('status'))}")
+            else:
+                # Quota exhaustion and auth errors come back as non-200
+                # without raising; they must trip the breaker too
+                breaker.record_failure()
+                logging.error(f"RapidAPI request failed with status: {response.status_code}")
+
         except Exception as e:
+            breaker.record_failure()
             logging.warning(f"RapidAPI download failed: {str(e)}")
 
             # Provide specific error message for Streamlit Community Cloud
@@ -315,9 +634,6 @@ class YouTubeSummarizer:
                 """)
                 return None, None
             
-            # Add a small delay
-            time.sleep(random.uniform(1, 2))
-            
             # Download using RapidAPI
             st.info("Downloading video...")
             audio_file, title = self.download_with_online_api(url)
@@ -360,115 +676,225 @@ class YouTubeSummarizer:
     def transcribe_audio(self, audio_file):
         """Transcribe audio using Whisper"""
         try:
-            # Convert to absolute path
-            audio_path = Path(audio_file).resolve()
-
-            # Check if audio file exists
-            if not audio_path.exists():
-                st.error("⚠️ Audio processing failed. Please try again.")
-                return None
+            if isinstance(audio_file, io.BytesIO):
+                # In-memory audio from the downloader
+                if audio_file.getbuffer().nbytes == 0:
+                    st.error("⚠️ Audio processing failed. Please try again.")
+                    return None
+                audio_file.seek(0)
+                audio_source = audio_file
+            else:
+                # One os.stat covers existence and emptiness; no need for
+                # the resolve/exists/stat/is_file syscall chain, and the
+                # decoder raises on anything else
+                try:
+                    if os.stat(audio_file).st_size == 0:
+                        st.error("⚠️ Audio processing failed. Please try again.")
+                        return None
+                except OSError:
+                    st.error("⚠️ Audio processing failed. Please try again.")
+                    return None
+                audio_source = str(audio_file)
 
-            # Check file size (empty files would be problematic)
-            file_size = audio_path.stat().st_size
+            model = self.load_whisper_model()
 
-            if file_size == 0:
-                st.error("⚠️ Audio processing failed. Please try again.")
-                return None
+            # Batch size for batched inference (lower it on memory-constrained hosts)
+            batch_size = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
 
-            # Additional checks
-            if not audio_path.is_file():
-                st.error("⚠️ Audio processing failed. Please try again.")
-                return None
+            # Segments come back as a lazy generator, so draining it through
+            # a placeholder shows text as it's decoded instead of leaving the
+            # user staring at a spinner for the whole file
+            live_text = st.empty()
 
-            model = self.load_whisper_model()
+            def drain(segments):
+                pieces = []
+                for segment in segments:
+                    pieces.append(segment.text.strip())
+                    live_text.text("... " + " ".join(pieces[-50:]))
+                live_text.empty()
+                return " ".join(pieces)
 
             with st.spinner("Transcribing audio..."):
-                result = model.transcribe(str(audio_path))
-                return result["text"]
+                try:
+                    # Forward VAD-segmented chunks through the model in
+                    # parallel; on faster-whisper builds without the batched
+                    # pipeline the ImportError lands in the fallback below
+                    from faster_whisper import BatchedInferencePipeline
+
+                    pipeline = BatchedInferencePipeline(model=model)
+                    segments, _ = pipeline.transcribe(
+                        audio_source,
+                        beam_size=1,
+                        best_of=1,
+                        temperature=0,
+                        batch_size=batch_size,
+                        without_timestamps=True,
+                        vad_filter=True,
+                        vad_parameters=dict(min_silence_duration_ms=500),
+                    )
+                    return drain(segments)
+                except Exception:
+                    # Fall back to sequential decoding if batching fails
+                    if isinstance(audio_source, io.BytesIO):
+                        audio_source.seek(0)
+                    segments, _ = model.transcribe(
+                        audio_source,
+                        beam_size=1,
+                        best_of=1,
+                        temperature=0,
+                        condition_on_previous_text=False,
+                        without_timestamps=True,
+                        vad_filter=True,
+                        vad_parameters=dict(min_silence_duration_ms=500),
+                    )
+                    return drain(segments)
 
         except Exception as e:
             st.error("⚠️ Audio transcription failed. Please try again.")
             return None
 
+    def _split_transcript(self, text, max_chars=MAX_CHUNK_CHARS):
+        """Split a transcript into chunks on sentence boundaries."""
+        sentences = re.split(r'(?<=[.!?]) +', text)
+        chunks = []
+        current = []
+        size = 0
+        for sentence in sentences:
+            if current and size + len(sentence) > max_chars:
+                chunks.append(" ".join(current))
+                current = []
+                size = 0
+            current.append(sentence)
+            size += len(sentence) + 1
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+
+    def _summarize_chunk(self, chunk):
+        """Summarize one transcript chunk (map step of map-reduce)."""
+        client = get_qwen_client(self.qwen_api_key)
+        response = client.chat.completions.create(
+            model=QWEN_MODEL,
+            messages=[{
+                "role": "user",
+                "content": f"Summarize this portion of a video transcript in a few sentences, keeping all key points:\n\n{chunk}",
+            }],
+            timeout=120,
+        )
+        return (response.choices[0].message.content or "").strip()
+
     def summarize_text(self, text, video_title=None):
-        """Summarize text using Qwen Coder CLI"""
+        """Summarize text using the Qwen API (falls back to the local CLI)"""
+        # Long transcripts: summarize chunks in parallel, then summarize the
+        # joined partials. Keeps each request well under context limits and
+        # overlaps the network-bound LLM calls.
+        if self.qwen_api_key and len(text) > MAX_CHUNK_CHARS * 2:
+            chunks = self._split_transcript(text)
+            try:
+                with st.spinner(f"Summarizing {len(chunks)} transcript sections..."):
+                    with ThreadPoolExecutor(max_workers=min(8, len(chunks))) as executor:
+                        partials = list(executor.map(self._summarize_chunk, chunks))
+                text = "\n".join(p for p in partials if p)
+            except Exception as e:
+                # Fall back to a single prompt over the full transcript
+                logging.warning(f"Chunked summarization failed: {str(e)}")
+
+        if self.qwen_api_key:
+            return self._summarize_via_api(text, video_title)
+
+        # Prepare the CLI prompt with video title context
+        if video_title:
+            prompt = _CLI_PROMPT_TITLED.format(title=video_title, text=text)
+        else:
+            prompt = _CLI_PROMPT_PLAIN.format(text=text)
+
+        return self._summarize_via_cli(prompt)
+
+    def _summarize_via_api(self, text, video_title=None):
+        """Summarize in-process via the OpenAI-compatible Qwen endpoint"""
         try:
-            # Create a temporary file with the transcript
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as temp_file:
-                temp_file.write(text)
-                temp_file_path = temp_file.name
-
-            # Prepare the prompt for Qwen Code with video title context
+            # The transcript goes in the user message only; the static
+            # instructions live in the shared system prompt
             if video_title:
-                prompt = f"""You are analyzing a YouTube video titled: "{video_title}"
-
-Please provide a very concise summary of the following transcript from this video:
-
-{text}
-
-Create a clear, comprehensive summary that captures the main points, key information, and context from the video title."""
+                user_content = f"Title: {video_title}\n\nTranscript:\n{text}"
             else:
-                prompt = f"""Please provide a very concise summary of the following transcript:
+                user_content = f"Transcript:\n{text}"
+
+            client = get_qwen_client(self.qwen_api_key)
+            stream = client.chat.completions.create(
+                model=QWEN_MODEL,
+                messages=[
+                    {"role": "system", "content": _SUMMARY_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_content},
+                ],
+                stream=True,
+                timeout=120,
+            )
 
-{text}
+            # Render tokens as they arrive instead of blocking on the
+            # full response; the final styled summary is drawn by main()
+            placeholder = st.empty()
+            summary = ""
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    summary += delta
+                    placeholder.markdown(summary)
+            placeholder.empty()
+
+            summary = summary.strip()
+            if not summary:
+                # Return None rather than a placeholder so main() bails
+                # before the empty result is written to the on-disk cache
+                st.error("⚠️ The model returned no summary. Please try again.")
+                return None
+            return summary
+        except Exception as e:
+            logging.error(f"Qwen API call failed: {str(e)}")
+            st.error("⚠️ AI processing failed. Please try again.")
+            return None
 
-Create a clear, very concise, comprehensive summary that captures the main points and key information."""
+    def _summarize_via_cli(self, prompt):
+        """Summarize via the local Qwen Coder CLI (no API key configured)"""
+        try:
+            # Ask for sentinel markers so the summary can be pulled out of
+            # the CLI's chatty stdout with one regex search
+            prompt = (
+                f"{prompt}\n\n"
+                "Output ONLY the summary between the markers <<<SUMMARY>>> and <<<END>>>."
+            )
 
             with st.spinner("Generating summary with Qwen Coder..."):
-                # Call Qwen Coder CLI with the prompt
-                result = subprocess.run([
-                    r'node',
-                    r'C:\\Users\\tesla\\AppData\\Roaming\\npm\\node_modules\\@qwen-code\\qwen-code\\dist\\index.js',
-                    '--prompt', prompt
-                ], capture_output=True, text=True, encoding='utf-8', timeout=120)
+                # Pipe the prompt through stdin; embedding the transcript
+                # in argv hits OS command-line length limits on long videos
+                with _QWEN_CLI_SEM:
+                    result = subprocess.run([
+                        r'node',
+                        r'C:\\Users\\tesla\\AppData\\Roaming\\npm\\node_modules\\@qwen-code\\qwen-code\\dist\\index.js',
+                    ], input=prompt, capture_output=True, text=True, encoding='utf-8', timeout=120)
 
                 if result.returncode != 0:
                     st.error("⚠️ AI processing failed. Please try again.")
                     return None
 
-                # Clean the output to remove system messages and keep only the actual summary
                 raw_output = result.stdout.strip()
 
-                # Remove common system messages from Qwen CLI output
-                system_messages = [
-                    "Loaded cached Qwen credentials.",
-                    "Loading Qwen model...",
-                    "Processing request...",
-                    "Generating response...",
-                    "Qwen Coder",
-                    "qwen-code",
-                    "Node.js",
-                    "npm"
-                ]
-
-                # Split output into lines and filter out system messages
-                lines = raw_output.split('\n')
-                cleaned_lines = []
-
-                for line in lines:
-                    line = line.strip()
-                    # Skip empty lines
-                    if not line:
-                        continue
-                    # Skip system messages (case-insensitive)
-                    if any(msg.lower() in line.lower() for msg in system_messages):
-                        continue
-                    # Skip lines that look like debug output (contain file paths, version info, etc.)
-                    if any(char in line for char in ['[', ']', '{', '}', 'C:\\', '/usr/', 'node_modules']):
-                        continue
-                    # Keep the line if it looks like actual summary content
-                    cleaned_lines.append(line)
-
-                # Join the cleaned lines back together
-                summary = '\n'.join(cleaned_lines).strip()
-
-                # Clean up the temporary file
-                try:
-                    os.unlink(temp_file_path)
-                except:
-                    pass
-
-                return summary if summary else "Summary could not be generated."
+                # Prefer the exact sentinel-delimited answer; fall back to
+                # line-by-line noise filtering for models that ignore it
+                match = _SUMMARY_SENTINEL_RE.search(raw_output)
+                if match:
+                    summary = match.group(1).strip()
+                else:
+                    lines = (line.strip() for line in raw_output.split('\n'))
+                    summary = '\n'.join(
+                        line for line in lines
+                        if line and not _CLI_NOISE_RE.search(line)
+                    ).strip()
+
+                if not summary:
+                    st.error("⚠️ The model returned no summary. Please try again.")
+                    return None
+                return summary
 
         except subprocess.TimeoutExpired:
             st.error("⚠️ Processing took too long. Please try with a shorter video.")
@@ -502,7 +928,7 @@ def main():
         whisper_model = st.selectbox(
             "Whisper model",
             ["tiny", "base", "small"],
-            index=1,
+            index=0,
             help="Larger models are more accurate but slower"
         )
 
@@ -511,8 +937,11 @@ def main():
 
     # Process when form is submitted (either by button click or Enter key)
     if submitted and url:
-        # Validate URL
-        if "youtube.com" not in url and "youtu.be" not in url:
+        # Validate by extracting the video ID up front — substring checks
+        # accept URLs the pipeline can't actually use, and every later
+        # step wants the ID anyway
+        video_id = summarizer.extract_video_id(url)
+        if not video_id:
             st.error("⚠️ Please enter a valid YouTube URL")
             return
 
@@ -521,40 +950,64 @@ def main():
         status_text = st.empty()
 
         try:
-            # Step 1: Get video title first
+            # Serve repeat URLs straight from the on-disk cache — no
+            # download, transcription, or LLM call
+            cached = summarizer.load_cached_result(video_id, whisper_model)
+            if cached and cached.get('summary'):
+                progress_bar.progress(100)
+                status_text.text("Complete!")
+
+                with st.expander("View full transcript"):
+                    st.text_area("Full transcript", cached.get('transcript', ''), height=200, disabled=True, label_visibility="hidden")
+
+                st.markdown("### Summary")
+                st.markdown(f'<div class="success-message">{cached["summary"]}</div>', unsafe_allow_html=True)
+
+                st.session_state.retry_count = 0
+                return
+
+            # Step 1: Fetch the video title and probe for captions in
+            # parallel — independent network calls, so total wall time is
+            # the slower of the two instead of their sum
             status_text.text("Getting video information...")
             progress_bar.progress(10)
-            video_title = summarizer.fetch_title_via_oembed(url)
-            
-            transcript = None
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                title_future = executor.submit(summarizer.fetch_title_via_oembed, url)
+                captions_future = executor.submit(summarizer.fetch_captions, video_id)
+                video_title = title_future.result()
+                # Existing captions let us skip download + transcription
+                transcript = captions_future.result()
+
+            progress_bar.progress(20)
             audio_file = None
-            
-            # Step 2: Download audio
-            status_text.text("Downloading audio...")
-            progress_bar.progress(30)
-            audio_file, video_title_dl = summarizer.download_youtube_video(url)
-            
-            if not audio_file:
-                # If download failed, error is already shown by download_youtube_video
-                return
-            
-            # Use download title if we didn't get one from oEmbed
-            if not video_title and video_title_dl:
-                video_title = video_title_dl
-            
-            # Update Whisper model if different from default
-            if whisper_model != "base":
-                summarizer.whisper_model = None  # Force reload
-                summarizer.whisper_model = whisper.load_model(whisper_model)
-                
-            # Step 3: Transcribe with Whisper
-            progress_bar.progress(50)
-            status_text.text(f"Transcribing audio with Whisper ({whisper_model} model)...")
-            transcript = summarizer.transcribe_audio(audio_file)
-            
+
             if not transcript:
-                st.error("⚠️ Transcription failed. Please try a different video.")
-                return
+                # Step 2b: Download audio while warming up the Whisper model;
+                # the model load is disk-bound and independent of the download
+                status_text.text("Downloading audio...")
+                progress_bar.progress(30)
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    model_future = executor.submit(get_whisper_model, whisper_model)
+                    audio_file, video_title_dl = summarizer.download_youtube_video(url)
+
+                if not audio_file:
+                    # If download failed, error is already shown by download_youtube_video
+                    return
+
+                # Use download title if we didn't get one from oEmbed
+                if not video_title and video_title_dl:
+                    video_title = video_title_dl
+
+                summarizer.whisper_model = model_future.result()
+
+                # Step 3: Transcribe with Whisper
+                progress_bar.progress(50)
+                status_text.text(f"Transcribing audio with Whisper ({whisper_model} model)...")
+                transcript = summarizer.transcribe_audio(audio_file)
+
+                if not transcript:
+                    st.error("⚠️ Transcription failed. Please try a different video.")
+                    return
 
             progress_bar.progress(60)
 
@@ -575,17 +1028,17 @@ def main():
             # Display results - focus on summary
             st.markdown("### Summary")
             st.markdown(f'<div class="success-message">{summary}</div>', unsafe_allow_html=True)
-            
+
+            # Remember the result so repeat URLs skip the whole pipeline;
+            # record where the transcript came from for cache validity
+            transcript_source = 'captions' if audio_file is None else whisper_model
+            summarizer.save_cached_result(
+                video_id, transcript, summary, video_title, source=transcript_source
+            )
+
             # Reset retry counter on success
             st.session_state.retry_count = 0
 
-            # Cleanup downloaded audio if any
-            if audio_file:
-                try:
-                    os.remove(audio_file)
-                except Exception:
-                    pass
-
         except Exception as e:
             st.markdown(f'<div class="error-message">❌ Error: {str(e)}</div>', unsafe_allow_html=True)
 